@@ -2,24 +2,47 @@ require('dotenv').config();
 const express = require('express');
 const crypto = require('crypto');
 const helmet = require('helmet');
+const { performance } = require('perf_hooks');
 const app = express();
+
 app.use(helmet());
-app.use(express.json());
-app.use(express.urlencoded({ extended: true }));
+
+// health: registered after helmet (keeps security headers) but ahead of the body parsers
+const HEALTH_BODY = 'ok';
+app.get('/', (req, res) => res.type('text/plain').send(HEALTH_BODY));
+
+// no route reads a request body, so keep parsers tight and reject large payloads early
+const MAX_BODY_SIZE = '10kb';
+app.use(express.json({ limit: MAX_BODY_SIZE }));
+app.use(express.urlencoded({ extended: true, limit: MAX_BODY_SIZE }));
 
 // tokens store
-const tokens = new Map(); // token => expiry timestamp
+const tokens = new Map(); // token => expiry (performance.now() ms, monotonic)
+const TOKEN_TTL_MS = 2 * 60 * 1000; // 2 minutes
+
+// drop tokens that expired without being used. every token gets the same TTL, so
+// Map insertion order is expiry order and the sweep can stop at the first live one
+function sweepExpiredTokens() {
+  const now = performance.now();
+  for (const [token, exp] of tokens) {
+    if (exp > now) break;
+    tokens.delete(token);
+  }
+}
+setInterval(sweepExpiredTokens, 60 * 1000).unref();
+
+const WHITESPACE_RE = /\s+/g;
+const BASE64_RE = /^[A-Za-z0-9+/=]+$/;
 
 function makeToken() {
   return crypto.randomBytes(16).toString('hex');
 }
 
-// helper: get script (supports raw or base64)
-function getScript() {
-  const env = process.env.SECRET_CODE || '';
+// helper: decode script (supports raw or base64)
+function decodeScript(env) {
   // if it looks like base64 (no newlines and only base64 chars) we try decode
-  const maybeBase64 = env.replace(/\s+/g, '');
-  if (maybeBase64.length > 0 && /^[A-Za-z0-9+/=]+$/.test(maybeBase64) && maybeBase64.length % 4 === 0) {
+  const maybeBase64 = env.replace(WHITESPACE_RE, '');
+  if (maybeBase64.length > 0 && BASE64_RE.test(maybeBase64) && maybeBase64.length % 4 === 0) {
     try {
       const decoded = Buffer.from(maybeBase64, 'base64').toString('utf8');
       // heuristics: decoded must contain keyword like 'print' or 'function' roughly
@@ -33,6 +56,18 @@ function getScript() {
   return env;
 }
 
+// cache the decoded script as a utf8 Buffer, keyed by the raw env value it came from,
+// so /source sends the same bytes without re-encoding per request
+let scriptCache = { raw: null, script: Buffer.alloc(0) };
+
+function getScript() {
+  const env = process.env.SECRET_CODE || '';
+  if (scriptCache.raw !== env) {
+    scriptCache = { raw: env, script: Buffer.from(decodeScript(env), 'utf8') };
+  }
+  return scriptCache.script;
+}
+
 // optional debug endpoint (shows presence, not content)
 app.get('/debug-env', (req, res) => {
   res.json({ hasSecret: !!process.env.SECRET_CODE, len: (process.env.SECRET_CODE || '').length });
@@ -47,8 +82,7 @@ app.get('/generate', (req, res) => {
     if (provided !== apiKey) return res.status(403).send('Invalid API key');
   }
   const token = makeToken();
-  const ttl = 2 * 60 * 1000; // 2 minutes
-  tokens.set(token, Date.now() + ttl);
+  tokens.set(token, performance.now() + TOKEN_TTL_MS);
   const url = `${req.protocol}://${req.get('host')}/source?token=${token}`;
   res.send(`✅ Token created (valid for 2 min)\n${url}`);
 });
@@ -56,7 +90,7 @@ app.get('/generate', (req, res) => {
 // /source
 app.get('/source', (req, res) => {
   const token = req.query.token;
-  const now = Date.now();
+  const now = performance.now();
   const exp = tokens.get(token);
   if (!exp || now > exp) return res.status(403).send('Invalid or expired token');
   tokens.delete(token); // single-use
@@ -65,12 +99,9 @@ app.get('/source', (req, res) => {
   if (!script || script.length === 0) {
     return res.status(200).type('text/plain').send('-- no code found --');
   }
-  res.setHeader('Content-Type', 'text/plain');
+  res.setHeader('Content-Type', 'text/plain; charset=utf-8');
   res.send(script);
 });
 
-// health
-app.get('/', (req, res) => res.send('ok'));
-
 const PORT = process.env.PORT || 3000;
 app.listen(PORT, () => console.log('Running on port', PORT));